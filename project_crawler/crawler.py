@@ -1,11 +1,15 @@
 import asyncio
+import math
 from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from enum import StrEnum
+from functools import lru_cache
+from hashlib import blake2b
 from importlib import import_module
 from pathlib import Path
 from types import ModuleType
 from typing import AsyncGenerator, Optional
-from urllib.parse import urljoin, urlparse
+from urllib.parse import unquote_plus, urljoin, urlparse, urlunparse
 from urllib.robotparser import RobotFileParser
 
 import networkx as nx
@@ -20,15 +24,130 @@ class Compressor(StrEnum):
 
 compressor_extensions = {Compressor.GZIP.value: ".gz", Compressor.LZMA.value: ".xz"}
 
+default_ports = {"http": 80, "https": 443}
+
+
+@dataclass(frozen=True)
+class CanonicalRules:
+    """Rules applied to every discovered url before it is visited"""
+
+    strip_fragment: bool = True
+    strip_trailing_slash: bool = True
+    sort_query: bool = True
+    lowercase_host: bool = True
+    drop_default_port: bool = True
+    ignored_params: frozenset[str] = field(default_factory=frozenset)
+
+
+class UrlCanonicalizer:
+    def __init__(
+        self, rules: CanonicalRules = CanonicalRules(), cache_size: int = 4096
+    ) -> None:
+        self.rules = rules
+        self._cached = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    def __call__(self, url: str) -> str:
+        """Return the canonical form of an absolute url"""
+        return self._cached(url)
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def _canonicalize(self, url: str) -> str:
+        parts = urlparse(url)
+        scheme = parts.scheme.lower()
+        netloc = parts.netloc
+        path = parts.path or "/"
+        query = parts.query
+        fragment = parts.fragment
+
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+
+        if (
+            self.rules.drop_default_port
+            and port is not None
+            and port == default_ports.get(scheme)
+        ):
+            userinfo, at, hostport = netloc.rpartition("@")
+            netloc = userinfo + at + hostport.rpartition(":")[0]
+        if self.rules.lowercase_host:
+            userinfo, at, hostport = netloc.rpartition("@")
+            netloc = userinfo + at + hostport.lower()
+        if self.rules.strip_trailing_slash and path != "/":
+            path = path.rstrip("/") or "/"
+        if query and (self.rules.ignored_params or self.rules.sort_query):
+            # Work on the raw pieces so the site's own escaping is kept as is
+            params = [
+                param
+                for param in query.split("&")
+                if unquote_plus(param.partition("=")[0])
+                not in self.rules.ignored_params
+            ]
+            if self.rules.sort_query:
+                params.sort(key=lambda param: param.partition("=")[0])
+            query = "&".join(params)
+        if self.rules.strip_fragment:
+            fragment = ""
+
+        return urlunparse((scheme, netloc, path, parts.params, query, fragment))
+
+
+class BloomFilter:
+    """Fixed memory set membership, with false positives at roughly error_rate"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item)
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
 
 class Crawler:
     def __init__(
-        self, client: AsyncClient, delay: float = 0.01, limit: int = 1000
+        self,
+        client: AsyncClient,
+        delay: float = 0.01,
+        limit: int = 1000,
+        canonicalizer: Optional[UrlCanonicalizer] = None,
+        visited_capacity: Optional[int] = None,
+        visited_error_rate: float = 0.01,
     ) -> None:
         self.delay = delay
         self.limit = limit
         self.client: AsyncClient = client
         self.roboparser: RobotFileParser = None
+        self.canonicalizer = canonicalizer or UrlCanonicalizer()
+        self.visited_capacity = visited_capacity
+        self.visited_error_rate = visited_error_rate
 
     async def parse_robotsfile(self) -> None:
         """Create a parser instance to check against while crawling"""
@@ -42,7 +161,12 @@ class Crawler:
 
     async def build_graph(self, start_url: str, max_depth: int = 5):
         G = nx.Graph()
-        visited = set()
+        if self.visited_capacity is not None:
+            visited = BloomFilter(self.visited_capacity, self.visited_error_rate)
+        else:
+            visited = set()
+        canonicalize = self.canonicalizer
+        start_netloc = urlparse(canonicalize(start_url)).netloc
 
         async def crawl(
             url: str,
@@ -51,14 +175,21 @@ class Crawler:
             robot_parser: RobotFileParser,
             delay: float = 0.0,
         ):
-            if depth > max_depth or url in visited:
+            key = canonicalize(url)
+            if depth > max_depth or key in visited:
                 return
 
-            if "#" in urlparse(url).path:
-                return
-
-            visited.add(url)
-            G.add_node(url)
+            visited.add(key)
+            G.add_node(key)
+            if (
+                isinstance(visited, BloomFilter)
+                and len(visited) == visited.capacity + 1
+            ):
+                print(
+                    "[Warning]: Visited urls exceeded bloom filter capacity,",
+                    "false positive rate will rise above",
+                    visited.error_rate,
+                )
 
             try:
                 response = await client.get(url)
@@ -84,12 +215,22 @@ class Crawler:
                     return
 
                 tree = html.fromstring(response.text)
+                base_url = str(response.url)
 
                 for href in tree.xpath("//a/@href"):
-                    full_url = urljoin(url, href)
+                    try:
+                        full_url = urljoin(base_url, href)
+                        full_key = canonicalize(full_url)
+                    except ValueError:
+                        continue
+
+                    if full_key == key:
+                        continue
 
-                    if urlparse(full_url).netloc == urlparse(start_url).netloc:
-                        G.add_edge(url, full_url)
+                    if urlparse(full_key).netloc == start_netloc:
+                        G.add_edge(key, full_key)
+                        if full_key in visited:
+                            continue
                         await asyncio.sleep(delay)
                         await crawl(full_url, depth + 1, client, robot_parser)
 
@@ -130,7 +271,12 @@ async def generate_client(
 
 
 async def main(
-    url: str, compressor: Compressor = Compressor.LZMA, force: bool = False
+    url: str,
+    compressor: Compressor = Compressor.LZMA,
+    force: bool = False,
+    visited_capacity: Optional[int] = None,
+    visited_error_rate: float = 0.01,
+    rules: CanonicalRules = CanonicalRules(),
 ) -> nx.Graph:
     compressor_module = import_module(compressor.value)
 
@@ -144,7 +290,13 @@ async def main(
             return nx.read_graphml(f)
 
     async with generate_client(url) as client:
-        crawler = Crawler(client=client, delay=0.01)
+        crawler = Crawler(
+            client=client,
+            delay=0.01,
+            canonicalizer=UrlCanonicalizer(rules),
+            visited_capacity=visited_capacity,
+            visited_error_rate=visited_error_rate,
+        )
         await crawler.parse_robotsfile()
         print("[Info]: Crawling Website")
         graph: nx.Graph = await crawler.build_graph(url)
@@ -18,9 +18,46 @@ def main() -> None:
         choices=[choice.value for choice in crawler.Compressor],
         default=crawler.Compressor.LZMA.value,
     )
+    parser.add_argument(
+        "--visited-capacity",
+        type=int,
+        default=None,
+        help=(
+            "Track visited urls with a bloom filter sized for this many pages, "
+            "instead of a set. The graph itself still stores every visited url"
+        ),
+    )
+    parser.add_argument(
+        "--visited-error-rate",
+        type=float,
+        default=None,
+        help=(
+            "False positive rate of the visited bloom filter at capacity "
+            "(default 0.01), requires --visited-capacity"
+        ),
+    )
+    parser.add_argument(
+        "--ignore-param",
+        action="append",
+        default=[],
+        help="Query parameter to drop from crawled urls, can be repeated",
+    )
     args = parser.parse_args()
+    if args.visited_error_rate is not None and args.visited_capacity is None:
+        parser.error("--visited-error-rate requires --visited-capacity")
+    if args.visited_error_rate is None:
+        args.visited_error_rate = 0.01
 
-    G: nx.Graph = asyncio.run(crawler.main(args.url, args.compressor, args.force))
+    G: nx.Graph = asyncio.run(
+        crawler.main(
+            args.url,
+            args.compressor,
+            args.force,
+            visited_capacity=args.visited_capacity,
+            visited_error_rate=args.visited_error_rate,
+            rules=crawler.CanonicalRules(ignored_params=frozenset(args.ignore_param)),
+        )
+    )
     print("Nodes:", G.number_of_nodes())
     print("Edges: ", G.number_of_edges())
 
@@ -0,0 +1,197 @@
+import pytest
+from httpx import AsyncClient, MockTransport, Response
+
+from project_crawler.crawler import (
+    BloomFilter,
+    CanonicalRules,
+    Crawler,
+    UrlCanonicalizer,
+)
+
+
+@pytest.fixture
+def canonicalize() -> UrlCanonicalizer:
+    return UrlCanonicalizer()
+
+
+def test_sorts_query(canonicalize):
+    assert canonicalize("http://h/a?y=2&x=1") == "http://h/a?x=1&y=2"
+
+
+def test_sort_keeps_repeated_key_order(canonicalize):
+    assert canonicalize("http://h/a?b=1&a=2&a=1") == "http://h/a?a=2&a=1&b=1"
+
+
+def test_keeps_query_escaping(canonicalize):
+    assert canonicalize("http://h/a?b&a=%7e+x") == "http://h/a?a=%7e+x&b"
+
+
+def test_non_utf8_queries_stay_distinct(canonicalize):
+    assert canonicalize("http://h/a?x=%FF") == "http://h/a?x=%FF"
+    assert canonicalize("http://h/a?x=%FE") == "http://h/a?x=%FE"
+
+
+def test_keeps_query_order_when_disabled():
+    canonicalize = UrlCanonicalizer(CanonicalRules(sort_query=False))
+    assert canonicalize("http://h/a?y=2&x=1") == "http://h/a?y=2&x=1"
+
+
+def test_drops_ignored_params():
+    canonicalize = UrlCanonicalizer(
+        CanonicalRules(ignored_params=frozenset({"utm_source"}))
+    )
+    assert canonicalize("http://h/a?utm_source=z&x=1") == "http://h/a?x=1"
+    assert canonicalize("http://h/a?utm%5Fsource=z") == "http://h/a"
+
+
+def test_strips_fragment(canonicalize):
+    assert canonicalize("http://h/a#top") == "http://h/a"
+
+
+def test_keeps_fragment_when_disabled():
+    canonicalize = UrlCanonicalizer(CanonicalRules(strip_fragment=False))
+    assert canonicalize("http://h/a#top") == "http://h/a#top"
+
+
+def test_strips_trailing_slash(canonicalize):
+    assert canonicalize("http://h/docs/") == "http://h/docs"
+
+
+def test_keeps_root_path(canonicalize):
+    assert canonicalize("http://h/") == "http://h/"
+    assert canonicalize("http://h") == "http://h/"
+
+
+def test_keeps_trailing_slash_when_disabled():
+    canonicalize = UrlCanonicalizer(CanonicalRules(strip_trailing_slash=False))
+    assert canonicalize("http://h/docs/") == "http://h/docs/"
+
+
+def test_lowercases_host(canonicalize):
+    assert canonicalize("HTTP://Example.COM/Path") == "http://example.com/Path"
+    assert canonicalize("http://User:PW@H/a") == "http://User:PW@h/a"
+
+
+def test_keeps_host_case_when_disabled():
+    canonicalize = UrlCanonicalizer(CanonicalRules(lowercase_host=False))
+    assert canonicalize("http://Example.COM/") == "http://Example.COM/"
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("http://h:80/a", "http://h/a"),
+        ("https://h:443/a", "https://h/a"),
+        ("http://u:p@h:80/a", "http://u:p@h/a"),
+        ("http://[::1]:80/a", "http://[::1]/a"),
+        ("http://h:8080/a", "http://h:8080/a"),
+        ("https://h:80/a", "https://h:80/a"),
+        ("ftp://[::1]/x", "ftp://[::1]/x"),
+    ],
+)
+def test_drops_default_port(canonicalize, url, expected):
+    assert canonicalize(url) == expected
+
+
+def test_keeps_default_port_when_disabled():
+    canonicalize = UrlCanonicalizer(CanonicalRules(drop_default_port=False))
+    assert canonicalize("http://h:80/a") == "http://h:80/a"
+
+
+@pytest.mark.parametrize("url", ["http://h:abc/", "http://h:99999/"])
+def test_bad_port_is_left_alone(canonicalize, url):
+    assert canonicalize(url) == url
+
+
+def test_cache_hits_on_repeated_url(canonicalize):
+    canonicalize("http://h/about")
+    canonicalize("http://h/about")
+    assert canonicalize.cache_info().hits == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"capacity": 0},
+        {"capacity": 10, "error_rate": 0},
+        {"capacity": 10, "error_rate": 1},
+    ],
+)
+def test_bloom_filter_rejects_bad_arguments(kwargs):
+    with pytest.raises(ValueError):
+        BloomFilter(**kwargs)
+
+
+def test_bloom_filter_error_rate_at_capacity():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"http://h/{i}")
+
+    assert len(bloom) == 10_000
+    assert all(f"http://h/{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"http://other/{i}" in bloom for i in range(10_000))
+    assert false_positives / 10_000 < 0.02
+
+
+def site(pages: dict[str, str]) -> AsyncClient:
+    def handler(request):
+        path = request.url.path
+        if path in pages:
+            return Response(
+                200, headers={"Content-Type": "text/html"}, text=pages[path]
+            )
+        return Response(404, text="")
+
+    return AsyncClient(base_url="http://h", transport=MockTransport(handler))
+
+
+async def crawl_site(pages: dict[str, str], **kwargs):
+    async with site(pages) as client:
+        crawler = Crawler(client=client, delay=0, **kwargs)
+        await crawler.parse_robotsfile()
+        return await crawler.build_graph("http://h/")
+
+
+@pytest.mark.asyncio
+async def test_relative_links_resolve_against_directory_page():
+    graph = await crawl_site(
+        {
+            "/": '<a href="/docs/">docs</a>',
+            "/docs/": '<a href="intro.html">intro</a>',
+            "/docs/intro.html": "<p>intro</p>",
+        }
+    )
+    assert graph.has_edge("http://h/docs", "http://h/docs/intro.html")
+    assert not graph.has_node("http://h/intro.html")
+
+
+@pytest.mark.asyncio
+async def test_bad_port_href_does_not_abort_crawl():
+    graph = await crawl_site(
+        {
+            "/": '<a href="http://h:abc/">bad</a><a href="http://h:99999/">bad</a>'
+            '<a href="/a">a</a>',
+            "/a": "<p>a</p>",
+        }
+    )
+    assert graph.has_node("http://h/a")
+
+
+@pytest.mark.asyncio
+async def test_duplicate_and_anchor_links_collapse():
+    graph = await crawl_site(
+        {
+            "/": '<a href="#top">top</a><a href="/a?y=2&x=1">a</a>'
+            '<a href="/a/?x=1&y=2">a</a>',
+            "/a": "<p>a</p>",
+        },
+        visited_capacity=100,
+    )
+    assert sorted(graph.nodes) == ["http://h/", "http://h/a?x=1&y=2"]
+    assert graph.number_of_edges() == 1
+
+
+@pytest.mark.asyncio
+async def test_zero_visited_capacity_is_rejected():
+    with pytest.raises(ValueError):
+        await crawl_site({"/": "<p>home</p>"}, visited_capacity=0)